@@ -1,16 +1,19 @@
-import argparse, sys
+import argparse, subprocess, sys
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from datetime import datetime
 
 sys.path.append(str(Path(__file__).parent.resolve()))
 
 from modules.utils import read_config, write_json, log
-from modules import speech_to_text, captions, thumbnail
+from modules import speech_to_text, thumbnail
 from modules.creator_intelligence import compute_virality_score
 from modules.story_builder import compose_story
 from modules.title_hashtag_generator import suggest_titles_and_tags
 from modules.voice_enhancer import ffmpeg_denoise_normalize
-from modules.video_editor_enhanced import export_with_effects
+from modules.pipeline_fused import fuse_export
+from modules import ai_enhance  # lazy package: submodules load on first use
 
 try:
     from modules.addons.merger import merge_and_convert
@@ -24,38 +27,64 @@ try:
     from modules.addons.insta_ready import export_instagram_ready
 except Exception:
     export_instagram_ready = None
+try:
+    from modules.addons._yolo_cache import get_model as get_yolo_model
+except Exception:
+    get_yolo_model = None
 
-def _maybe_merge_input(merge_dir: str, codec: str, audio_bitrate: str) -> str:
+def _maybe_merge_input(merge_dir: str, codec: str, audio_bitrate: str, hwaccel: bool = False) -> str:
     if not merge_dir: return None
     if not merge_and_convert:
         raise RuntimeError("Merge addon not installed.")
     out_file = Path("inputs_merged"); out_file.mkdir(parents=True, exist_ok=True)
     merged_path = str(out_file / f"merged_{datetime.now().strftime('%Y%m%d_%H%M%S')}.mp4")
     log(f"[MERGE] Merging {merge_dir} → {merged_path}")
-    logs = merge_and_convert(merge_dir, merged_path, codec=codec, audio_bitrate=audio_bitrate)
+    logs = merge_and_convert(merge_dir, merged_path, codec=codec, audio_bitrate=audio_bitrate, hwaccel=hwaccel)
     log("[MERGE] ffmpeg logs:\n" + "\n".join(logs[-30:]), print_also=False)
     return merged_path
 
-def _maybe_blur_plates(path_in: str, path_out: str, yolo_path: str, blur_k: int) -> str:
+def _maybe_blur_plates(path_in: str, path_out: str, yolo_path: str, blur_k: int, model=None) -> str:
     if not blur_plates_video:
         log("[BLUR] Skipped (addon not installed)."); return path_in
     log(f"[BLUR] Blurring number plates → {path_out}")
-    logs = blur_plates_video(path_in, path_out, yolo_path=yolo_path, k=blur_k)
+    if model is None:
+        model = get_yolo_model(yolo_path) if get_yolo_model else None
+    logs = blur_plates_video(path_in, path_out, yolo_path=yolo_path, k=blur_k, model=model)
     log("[BLUR] logs:\n" + "\n".join(logs[-30:]), print_also=False)
     return path_out
 
-def _maybe_insta_ready(path_in: str, out_path: str, v_bitrate: str, a_bitrate: str, a_rate: str) -> str:
+def _maybe_insta_ready(path_in: str, out_path: str, v_bitrate: str, a_bitrate: str, a_rate: str, v_codec: str = "auto", hwaccel: bool = False) -> str:
     if not export_instagram_ready:
         log("[INSTA] Skipped (addon not installed)."); return path_in
     log(f"[INSTA] Exporting insta-ready → {out_path}")
-    logs = export_instagram_ready(path_in, out_path, v_bitrate=v_bitrate, a_bitrate=a_bitrate, a_rate=a_rate)
+    logs = export_instagram_ready(path_in, out_path, v_bitrate=v_bitrate, a_bitrate=a_bitrate, a_rate=a_rate, v_codec=v_codec, hwaccel=hwaccel)
     log("[INSTA] ffmpeg logs:\n" + "\n".join(logs[-30:]), print_also=False)
     return out_path
 
+def _process_clip(i, s, cfg, input_video, mood_default, blur_plates, blur_model, blur_strength, preloaded_models=None):
+    # Fused cut + effects + caption burn-in: one ffmpeg decode/encode per clip.
+    start = s["start"]; duration = max(0.3, s["end"] - s["start"])
+    mood = s.get("mood", mood_default)
+    out = Path(f"outputs/clips/highlight_{i}_captioned.mp4"); out.parent.mkdir(parents=True, exist_ok=True)
+    fuse_export(input_video, out, start_s=start, duration_s=duration,
+                target_res=cfg.get("output_resolution","1080x1920"), mood=mood)
+    if blur_plates:
+        blurred = str(Path(out).with_name(Path(out).stem + "_blur.mp4"))
+        try:
+            _maybe_blur_plates(str(out), blurred, yolo_path=blur_model, blur_k=blur_strength,
+                               model=(preloaded_models or {}).get("plate_yolo"))
+            out = Path(blurred)
+        except Exception as e:
+            log(f"[WARN] Plate blur failed for highlight_{i}: {e}")
+    thumb_time = (s["start"] + s["end"]) / 2
+    thumbnail.generate_thumbnail(str(out), thumb_time, f"outputs/thumbnails/thumb_{i}.jpg", f"🔥 Highlight #{i}")
+    log(f"[SUCCESS] Exported highlight_{i} ({duration:.1f}s)")
+    return str(out)
+
 def run_pipeline(
     input_video: str = None,
     merge_dir: str = None,
-    merge_codec: str = "libx264",
+    merge_codec: str = "auto",
     merge_audio_bitrate: str = "192k",
     blur_plates: bool = False,
     blur_model: str = "modules/addons/yolov8s.pt",
@@ -64,15 +93,18 @@ def run_pipeline(
     insta_v_bitrate: str = "5M",
     insta_a_bitrate: str = "128k",
     insta_a_rate: str = "44100",
+    insta_v_codec: str = "auto",
     mood_default: str = "neutral",
     enable_ai_enhance: bool = False,
     enable_bg_music: bool = False,
     enable_smart_transitions: bool = False,
+    hwaccel: bool = False,
+    preloaded_models: dict = None,
 ):
     cfg = read_config()
 
     if merge_dir:
-        input_video = _maybe_merge_input(merge_dir, codec=merge_codec, audio_bitrate=merge_audio_bitrate)
+        input_video = _maybe_merge_input(merge_dir, codec=merge_codec, audio_bitrate=merge_audio_bitrate, hwaccel=hwaccel)
     if not input_video:
         raise ValueError("No input video provided (use --input or --merge_dir).")
 
@@ -102,33 +134,20 @@ def run_pipeline(
     story_clips = compose_story(highlights, transcript_json, max_total_sec=45)
     write_json(story_clips, "outputs/logs/story_sequence.json")
 
-    log("Step 5️⃣: Exporting cinematic clips with effects...")
-    clips = []
-    for i, s in enumerate(story_clips, start=1):
-        start = s["start"]; duration = max(0.3, s["end"] - s["start"])
-        mood = s.get("mood", mood_default)
-        raw_out = Path(f"outputs/clips/highlight_{i}.mp4"); raw_out.parent.mkdir(parents=True, exist_ok=True)
-        export_with_effects(input_video, raw_out, start_s=start, duration_s=duration, target_res=cfg.get("output_resolution","1080x1920"), mood=mood)
-        if blur_plates:
-            blurred = str(Path(raw_out).with_name(Path(raw_out).stem + "_blur.mp4"))
-            try:
-                _maybe_blur_plates(str(raw_out), blurred, yolo_path=blur_model, blur_k=blur_strength)
-                raw_out = Path(blurred)
-            except Exception as e:
-                log(f"[WARN] Plate blur failed for highlight_{i}: {e}")
-        clips.append(str(raw_out))
-        log(f"[SUCCESS] Exported highlight_{i}.mp4 ({duration:.1f}s)")
+    workers = max(1, min(len(story_clips), int(cfg.get("parallel_clips", 2))))
 
-    log("Step 6️⃣: Adding captions & thumbnails...")
-    finals = []
-    for i, clip_path in enumerate(clips, start=1):
-        start_time = story_clips[i-1]["start"]
-        captioned_path = str(Path(clip_path).with_name(Path(clip_path).stem + "_captioned.mp4"))
-        captions.overlay_captions(clip_path, transcript_json, start_time, captioned_path)
-        thumb_time = (story_clips[i-1]["start"] + story_clips[i-1]["end"]) / 2
-        thumb_path = f"outputs/thumbnails/thumb_{i}.jpg"
-        thumbnail.generate_thumbnail(captioned_path, thumb_time, thumb_path, f"🔥 Highlight #{i}")
-        finals.append(captioned_path)
+    log("Step 5️⃣+6️⃣: Exporting cinematic clips (fused cut+captions) & thumbnails...")
+    idx = range(1, len(story_clips) + 1)
+    # Preloaded model handles don't survive pickling into pool workers;
+    # those fall back to the per-process _yolo_cache loader.
+    clip_args = (idx, story_clips, repeat(cfg), repeat(input_video), repeat(mood_default),
+                 repeat(blur_plates), repeat(blur_model), repeat(blur_strength),
+                 repeat(preloaded_models if workers == 1 else None))
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            finals = list(pool.map(_process_clip, *clip_args))
+    else:
+        finals = list(map(_process_clip, *clip_args))
     
     # AI Enhancements
     ai_cfg = cfg.get("ai_enhancements", {})
@@ -136,12 +155,11 @@ def run_pipeline(
     if enable_ai_enhance or ai_cfg.get("video_upscale_enabled") or ai_cfg.get("color_enhance_enabled"):
         log("Step 6.5️⃣: Applying AI video enhancements...")
         try:
-            from modules.ai_enhance.video_enhancer import enhance_video
             enhanced_finals = []
             for i, clip_path in enumerate(finals, start=1):
                 enhanced_path = str(Path(clip_path).with_name(Path(clip_path).stem + "_enhanced.mp4"))
                 Path(enhanced_path).parent.mkdir(parents=True, exist_ok=True)
-                enhance_video(
+                ai_enhance.enhance_video(
                     clip_path, enhanced_path,
                     upscale=ai_cfg.get("video_upscale_enabled", False),
                     upscale_factor=ai_cfg.get("upscale_factor", 2),
@@ -161,23 +179,23 @@ def run_pipeline(
     if enable_bg_music or ai_cfg.get("background_music_enabled"):
         log("Step 6.6️⃣: Adding AI-generated background music...")
         try:
-            from modules.ai_enhance.music_generator import generate_background_music, sync_music_to_beats
+            # Probe every clip duration up front, overlapping the ffprobe
+            # processes instead of running them serially per clip.
+            def _probe(p):
+                return float(subprocess.check_output(
+                    ["ffprobe", "-v", "error", "-show_entries", "format=duration",
+                     "-of", "csv=p=0", p], stderr=subprocess.DEVNULL))
+            with ThreadPoolExecutor(max_workers=min(8, len(finals))) as ex:
+                durations = dict(zip(finals, ex.map(_probe, finals)))
             music_finals = []
             for i, clip_path in enumerate(finals, start=1):
-                # Get clip duration
-                import subprocess
-                result = subprocess.run(
-                    ["ffprobe", "-v", "error", "-show_entries", "format=duration",
-                     "-of", "default=noprint_wrappers=1:nokey=1", clip_path],
-                    capture_output=True, text=True
-                )
-                duration = float(result.stdout.strip())
-                
+                duration = durations[clip_path]
+
                 # Generate music
                 mood = story_clips[i-1].get("mood", mood_default)
                 temp_music = Path("outputs/temp") / f"music_{i}.mp4"
                 temp_music.parent.mkdir(parents=True, exist_ok=True)
-                generate_background_music(
+                ai_enhance.generate_background_music(
                     str(temp_music), duration,
                     mood=mood,
                     style=ai_cfg.get("music_style", "ambient")
@@ -185,7 +203,7 @@ def run_pipeline(
                 
                 # Sync with video
                 music_path = str(Path(clip_path).with_name(Path(clip_path).stem + "_music.mp4"))
-                sync_music_to_beats(
+                ai_enhance.sync_music_to_beats(
                     clip_path, str(temp_music), music_path,
                     beat_sync=ai_cfg.get("beat_sync_enabled", True),
                     volume_level=ai_cfg.get("music_volume", 0.3)
@@ -199,10 +217,9 @@ def run_pipeline(
     if enable_smart_transitions or (ai_cfg.get("transitions_enabled") and len(finals) > 1):
         log("Step 6.7️⃣: Applying smart transitions...")
         try:
-            from modules.ai_enhance.smart_transitions import apply_smart_transition
             merged_path = "outputs/final/merged_with_transitions.mp4"
             Path(merged_path).parent.mkdir(parents=True, exist_ok=True)
-            apply_smart_transition(
+            ai_enhance.apply_smart_transition(
                 finals, merged_path,
                 transition_style=ai_cfg.get("transition_style", "auto"),
                 transition_duration=ai_cfg.get("transition_duration", 0.5),
@@ -218,7 +235,7 @@ def run_pipeline(
         for path in finals:
             out_insta = str(Path(path).with_name(Path(path).stem + "_insta.mp4"))
             try:
-                _maybe_insta_ready(path, out_insta, v_bitrate=insta_v_bitrate, a_bitrate=insta_a_bitrate, a_rate=insta_a_rate)
+                _maybe_insta_ready(path, out_insta, v_bitrate=insta_v_bitrate, a_bitrate=insta_a_bitrate, a_rate=insta_a_rate, v_codec=insta_v_codec, hwaccel=hwaccel)
                 insta_outs.append(out_insta)
             except Exception as e:
                 log(f"[WARN] Insta export failed for {path}: {e}")
@@ -234,12 +251,12 @@ def run_pipeline(
     print("➡ outputs/thumbnails/ (thumbnails)")
     print("➡ outputs/logs/title_hashtags.json (title suggestions)\n")
 
-def parse_args():
+def parse_args(argv=None):
     import argparse
     p = argparse.ArgumentParser(description="Pragya Studio — AI Shorts Generator (with Add-Ons)")
     p.add_argument("--input", help="Path to input video (MP4). Ignored if --merge_dir is used.")
     p.add_argument("--merge_dir", help="Folder of videos to merge before processing.")
-    p.add_argument("--merge_codec", default="libx264", help="Merge video codec (libx264/libx265/copy)")
+    p.add_argument("--merge_codec", default="auto", help="Merge video codec (auto/libx264/libx265/copy); auto stream-copies homogeneous inputs")
     p.add_argument("--merge_audio_bitrate", default="192k", help="Merge audio bitrate")
     p.add_argument("--blur_plates", action="store_true", help="Blur number plates on exported clips")
     p.add_argument("--blur_model", default="modules/addons/yolov8s.pt", help="YOLO model path for blur")
@@ -248,18 +265,24 @@ def parse_args():
     p.add_argument("--insta_v_bitrate", default="5M")
     p.add_argument("--insta_a_bitrate", default="128k")
     p.add_argument("--insta_a_rate", default="44100")
+    p.add_argument("--insta_v_codec", default="auto", help="Insta video encoder (auto/libx264/h264_nvenc/...)")
     p.add_argument("--mood_default", default="neutral", help="Fallback mood")
+    p.add_argument("--hwaccel", action="store_true", help="Use -hwaccel auto for decode in merge/insta exports")
     # AI Enhancement flags
     p.add_argument("--enable_ai_enhance", action="store_true", help="Enable AI video enhancements")
     p.add_argument("--enable_bg_music", action="store_true", help="Enable AI background music generation")
     p.add_argument("--enable_smart_transitions", action="store_true", help="Enable smart transitions")
-    args = p.parse_args()
+    args = p.parse_args(argv)
     if not args.merge_dir and not args.input:
         p.error("Provide --input OR --merge_dir.")
     return args
 
-if __name__ == "__main__":
-    a = parse_args()
+def main(argv=None, preloaded_models=None):
+    # Callable entry point so long-lived hosts (the Streamlit app) can run
+    # the pipeline in-process instead of paying a fresh interpreter plus
+    # torch/whisper imports per run. preloaded_models maps names (e.g.
+    # "plate_yolo") to already-loaded model handles, skipping deserialisation.
+    a = parse_args(argv)
     run_pipeline(
         input_video=a.input,
         merge_dir=a.merge_dir,
@@ -272,8 +295,14 @@ if __name__ == "__main__":
         insta_v_bitrate=a.insta_v_bitrate,
         insta_a_bitrate=a.insta_a_bitrate,
         insta_a_rate=a.insta_a_rate,
+        insta_v_codec=a.insta_v_codec,
         mood_default=a.mood_default,
         enable_ai_enhance=a.enable_ai_enhance,
         enable_bg_music=a.enable_bg_music,
         enable_smart_transitions=a.enable_smart_transitions,
+        hwaccel=a.hwaccel,
+        preloaded_models=preloaded_models,
     )
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,46 @@
 import subprocess
 
-def export_instagram_ready(input_path, output_path, v_bitrate="5M", a_bitrate="128k", a_rate="44100"):
+from ..utils import h264_encoder_args, run_ffmpeg_logged
+
+def export_instagram_ready(input_path, output_path, v_bitrate="5M", a_bitrate="128k",
+                           a_rate="44100", v_codec="auto", preset="veryfast", tune=None,
+                           hwaccel=False):
+    vf = "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2"
+    pre_args = []
+    vaapi = v_codec.endswith("_vaapi")
+    # preset/tune only make sense for the software x264/x265 encoders
+    sw_args = ["-preset", preset, "-threads", "0"] + (["-tune", tune] if tune else [])
+    if v_codec == "auto":
+        hw_args = h264_encoder_args()
+        if hw_args:
+            v_args = hw_args + ["-b:v", v_bitrate]
+        else:
+            v_args = ["-c:v", "libx264", "-profile:v", "high", "-level", "4.2", "-b:v", v_bitrate] + sw_args
+    elif vaapi:
+        # VAAPI encodes GPU surfaces, so upload after the software scale/pad
+        pre_args = ["-vaapi_device", "/dev/dri/renderD128"]
+        vf += ",format=nv12,hwupload"
+        v_args = ["-c:v", v_codec, "-b:v", v_bitrate]
+    elif v_codec == "libx264":
+        v_args = ["-c:v", "libx264", "-profile:v", "high", "-level", "4.2", "-b:v", v_bitrate] + sw_args
+    elif v_codec == "libx265":
+        v_args = ["-c:v", "libx265", "-b:v", v_bitrate] + sw_args
+    else:
+        v_args = ["-c:v", v_codec, "-b:v", v_bitrate]
     cmd = [
         "ffmpeg","-y",
+        # -hwaccel decodes to system memory by default, so the software
+        # scale/pad chain (and the VAAPI hwupload tail) still work.
+        *(["-hwaccel", "auto"] if hwaccel else []),
+        *pre_args,
         "-i", input_path,
-        "-vf", "scale=1080:1920:force_original_aspect_ratio=decrease,pad=1080:1920:(ow-iw)/2:(oh-ih)/2",
-        "-c:v", "libx264", "-profile:v", "high", "-level", "4.2", "-b:v", v_bitrate, "-pix_fmt", "yuv420p",
+        "-vf", vf,
+    ] + v_args + ([] if vaapi else ["-pix_fmt", "yuv420p"]) + [
         "-c:a", "aac", "-b:a", a_bitrate, "-ar", str(a_rate),
         "-movflags", "+faststart",
         output_path
     ]
-    out = [" ".join(cmd)]
-    p = subprocess.run(cmd, capture_output=True, text=True)
-    out += [p.stdout or "", p.stderr or ""]
-    if p.returncode != 0:
+    rc, out = run_ffmpeg_logged(cmd)
+    if rc != 0:
         raise RuntimeError("FFmpeg failed (see logs).")
     return out
@@ -1,34 +1,76 @@
 import os, subprocess
 from pathlib import Path
 
-def merge_and_convert(input_folder, output_file, codec="libx264", audio_bitrate="192k"):
+from ..utils import h264_encoder_args, run_ffmpeg_logged
+
+def _stream_params(path):
+    # (codec, width, height, pix_fmt, sample_rate, channels) per stream, or
+    # None if ffprobe fails — callers treat None as "not copyable".
+    try:
+        out = subprocess.check_output([
+            "ffprobe","-v","error",
+            "-show_entries","stream=codec_name,width,height,pix_fmt,sample_rate,channels",
+            "-of","csv=p=0", path
+        ], stderr=subprocess.DEVNULL, text=True)
+        return tuple(out.split())
+    except Exception:
+        return None
+
+# Encoder name -> the codec_name ffprobe reports for streams it produced.
+_ENCODER_CODEC = {"libx264": "h264", "libx265": "hevc"}
+
+def _copyable(videos, codec):
+    # Stream copy is safe when every input shares identical stream parameters
+    # and the caller either asked for copy outright or the sources already
+    # carry the requested codec.
+    params = _stream_params(videos[0])
+    if params is None or any(_stream_params(v) != params for v in videos[1:]):
+        return False
+    if codec in ("copy", "auto"):
+        return True
+    src_codec = params[0].split(",")[0]
+    return _ENCODER_CODEC.get(codec, codec) == src_codec
+
+def merge_and_convert(input_folder, output_file, codec="auto", audio_bitrate="192k", preset="veryfast", hwaccel=False):
     video_extensions = (".mp4", ".mov", ".mkv", ".avi", ".flv")
     videos = sorted(
-        [str(Path(input_folder) / f) for f in os.listdir(input_folder) if f.lower().endswith(video_extensions)]
+        entry.path for entry in os.scandir(input_folder)
+        if entry.is_file() and entry.name.lower().endswith(video_extensions)
     )
     if not videos:
         raise RuntimeError("No video files found in folder.")
 
     file_list_path = Path(input_folder) / "input_videos.txt"
-    with open(file_list_path, "w", encoding="utf-8") as f:
-        for v in videos:
-            safe = v.replace("'", "'\''")
-            f.write(f"file '{safe}'\n")
+    body = "".join("file '%s'\n" % v.replace("'", "'\''") for v in videos)
+    file_list_path.write_text(body, encoding="utf-8")
 
-    cmd = [
-        "ffmpeg","-y",
+    cmd = ["ffmpeg","-y"]
+    if hwaccel:
+        # Decode-side acceleration (NVDEC/VAAPI picked by ffmpeg); inert
+        # on the stream-copy branch, which never decodes.
+        cmd += ["-hwaccel","auto"]
+    cmd += [
         "-f","concat","-safe","0",
         "-i", str(file_list_path),
-        "-c:v", codec,
-        "-c:a", "aac",
-        "-b:a", audio_bitrate,
-        output_file
     ]
-    logs = [" ".join(cmd)]
-    p = subprocess.run(cmd, capture_output=True, text=True)
-    logs += [p.stdout or "", p.stderr or ""]
+    if _copyable(videos, codec):
+        # Homogeneous inputs: concat at stream-copy speed, no re-encode.
+        cmd += ["-c","copy"]
+    else:
+        if codec in ("auto", "copy"):
+            codec = "libx264"
+        hw_args = h264_encoder_args() if codec == "libx264" else None
+        if hw_args:
+            cmd += hw_args
+        else:
+            cmd += ["-c:v", codec]
+            if codec in ("libx264", "libx265"):
+                cmd += ["-preset", preset]
+        cmd += ["-c:a", "aac", "-b:a", audio_bitrate]
+    cmd.append(output_file)
+    rc, logs = run_ffmpeg_logged(cmd)
     try: os.remove(file_list_path)
     except Exception: pass
-    if p.returncode != 0:
+    if rc != 0:
         raise RuntimeError("FFmpeg merge failed.")
     return logs
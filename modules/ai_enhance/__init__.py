@@ -3,21 +3,29 @@ AI Enhancement Module for Pragya Studio
 Provides advanced AI-powered video enhancement features
 """
 
-from .video_enhancer import enhance_video, upscale_video, apply_color_enhancement, apply_hdr_conversion
-from .music_generator import generate_background_music, sync_music_to_beats
-from .smart_transitions import apply_smart_transition, detect_scene_changes
-from .face_tracker import track_faces, smart_crop_portrait, export_multi_aspect
+# The submodules pull in heavy optional deps (cv2, mediapipe, librosa), so
+# they are resolved lazily on first attribute access (PEP 562) instead of
+# being imported eagerly with the package.
 
-__all__ = [
-    'enhance_video',
-    'upscale_video', 
-    'apply_color_enhancement',
-    'apply_hdr_conversion',
-    'generate_background_music',
-    'sync_music_to_beats',
-    'apply_smart_transition',
-    'detect_scene_changes',
-    'track_faces',
-    'smart_crop_portrait',
-    'export_multi_aspect'
-]
+_EXPORTS = {
+    'enhance_video': 'video_enhancer',
+    'upscale_video': 'video_enhancer',
+    'apply_color_enhancement': 'video_enhancer',
+    'apply_hdr_conversion': 'video_enhancer',
+    'generate_background_music': 'music_generator',
+    'sync_music_to_beats': 'music_generator',
+    'apply_smart_transition': 'smart_transitions',
+    'detect_scene_changes': 'smart_transitions',
+    'track_faces': 'face_tracker',
+    'smart_crop_portrait': 'face_tracker',
+    'export_multi_aspect': 'face_tracker',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        from importlib import import_module
+        return getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
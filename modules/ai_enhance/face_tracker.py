@@ -3,73 +3,246 @@ Face Tracking Module
 Provides advanced face detection, smart portrait cropping, and multi-aspect ratio support
 """
 
+import functools
+import queue
 import subprocess
+import threading
 import cv2
 import numpy as np
+from dataclasses import dataclass
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 import mediapipe as mp
 
+from ..utils import h264_encoder_args, log
 
-def track_faces(video_path: str, confidence_threshold: float = 0.5) -> List[Dict]:
+try:
+    import av
+except Exception:
+    av = None
+
+
+@dataclass
+class VideoTracking:
+    """
+    Per-frame face tracking data plus the source stream's metadata, so
+    downstream helpers don't re-open the video just to read dimensions.
+
+    Behaves like the plain frame list it replaced (iteration, len,
+    indexing), so existing consumers keep working.
+    """
+    frames: List[Dict]
+    width: int
+    height: int
+    fps: float
+
+    def __iter__(self):
+        return iter(self.frames)
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        return self.frames[i]
+
+
+def _video_meta(tracking_data, video_path: str) -> Tuple[int, int, float]:
+    """(width, height, fps) from tracking metadata, probing only if absent."""
+    if isinstance(tracking_data, VideoTracking):
+        return tracking_data.width, tracking_data.height, tracking_data.fps
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    cap.release()
+    return width, height, fps
+
+
+@functools.lru_cache(maxsize=4)
+def _get_face_detector(confidence_threshold: float):
+    """
+    Persistent MediaPipe detector per confidence setting.
+
+    Building FaceDetection loads and binds the TFLite graph each time;
+    keeping one instance alive amortizes that across every track_faces
+    call in the process.
+    """
+    return mp.solutions.face_detection.FaceDetection(
+        model_selection=1,
+        min_detection_confidence=confidence_threshold
+    )
+
+
+def _interpolate_tracking(sampled: List[Dict], n_frames: int, fps: float) -> List[Dict]:
+    """
+    Expand sparse tracking samples back to per-frame entries.
+
+    Bounding boxes are linearly interpolated between neighbouring samples
+    (when the face count matches) so downstream consumers still see one
+    entry per frame.
+    """
+    frames = []
+    for k, cur in enumerate(sampled):
+        frames.append(cur)
+        nxt = sampled[k + 1] if k + 1 < len(sampled) else None
+        end = nxt["frame"] if nxt else n_frames
+        span = end - cur["frame"]
+        for j in range(1, span):
+            idx = cur["frame"] + j
+            t = j / span
+            if nxt and len(cur["faces"]) == len(nxt["faces"]):
+                faces = [
+                    {
+                        "x": int(a["x"] + (b["x"] - a["x"]) * t),
+                        "y": int(a["y"] + (b["y"] - a["y"]) * t),
+                        "width": int(a["width"] + (b["width"] - a["width"]) * t),
+                        "height": int(a["height"] + (b["height"] - a["height"]) * t),
+                        "confidence": a["confidence"]
+                    }
+                    for a, b in zip(cur["faces"], nxt["faces"])
+                ]
+            else:
+                faces = [dict(f) for f in cur["faces"]]
+            frames.append({
+                "frame": idx,
+                "timestamp": idx / fps if fps > 0 else 0,
+                "faces": faces
+            })
+    return frames
+
+
+def track_faces(video_path: str, confidence_threshold: float = 0.5,
+                sample_fps: Optional[float] = None) -> VideoTracking:
     """
     Track faces throughout video using MediaPipe
-    
+
     Args:
         video_path: Path to video file
         confidence_threshold: Minimum confidence for face detection
-    
+        sample_fps: Detection sampling rate (None = every frame). Skipped
+            frames are only grab()-ed, never decoded, and their bounding
+            boxes are interpolated from the neighbouring samples
+
     Returns:
-        List of face tracking data for each frame
+        VideoTracking with per-frame tracking data and stream metadata
     """
-    mp_face_detection = mp.solutions.face_detection
-    face_detection = mp_face_detection.FaceDetection(
-        model_selection=1, 
-        min_detection_confidence=confidence_threshold
-    )
-    
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    
-    tracking_data = []
-    frame_idx = 0
-    
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
+    face_detection = _get_face_detector(confidence_threshold)
+
+    # Decode on a background thread so MediaPipe inference overlaps with
+    # decoding the next frame instead of serializing behind it. PyAV is
+    # preferred: it drives libav's multi-threaded decoder and emits RGB
+    # directly, skipping the per-frame BGR->RGB conversion.
+    frame_q: "queue.Queue" = queue.Queue(maxsize=8)
+    frames_are_rgb = av is not None
+
+    if av is not None:
+        container = av.open(video_path)
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        fps = float(stream.average_rate or 0)
+        src_width = stream.codec_context.width
+        src_height = stream.codec_context.height
+        step = max(1, int(round(fps / sample_fps))) if sample_fps and fps > 0 else 1
+
+        def _reader():
+            idx = 0
+            for av_frame in container.decode(stream):
+                if idx % step == 0:
+                    frame_q.put((idx, av_frame.to_ndarray(format="rgb24")))
+                idx += 1
+            container.close()
+            frame_q.put((idx, None))
+    else:
+        cap = cv2.VideoCapture(video_path)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        src_width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        src_height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        step = max(1, int(round(fps / sample_fps))) if sample_fps and fps > 0 else 1
+
+        def _reader():
+            idx = 0
+            while cap.isOpened():
+                # grab() advances the demuxer without the YUV->BGR conversion;
+                # retrieve() only pays the decode cost on sampled frames.
+                if not cap.grab():
+                    break
+                if idx % step == 0:
+                    ret, frame = cap.retrieve()
+                    if not ret:
+                        break
+                    frame_q.put((idx, frame))
+                idx += 1
+            cap.release()
+            frame_q.put((idx, None))
+
+    threading.Thread(target=_reader, daemon=True).start()
+
+    sampled = []
+    n_frames = 0
+
+    # Fuzzy frame cache: a 32x32 fingerprint is compared to the previous
+    # sampled frame and, when the mean absolute difference is tiny (static
+    # shot), the previous detection is reused instead of re-running MediaPipe.
+    prev_small = None
+    prev_faces = None
+    cache_hits = cache_misses = 0
+
+    while True:
+        frame_idx, frame = frame_q.get()
+        if frame is None:
+            n_frames = frame_idx
             break
-        
-        # Convert to RGB for MediaPipe
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = face_detection.process(rgb_frame)
-        
+
         frame_data = {
             "frame": frame_idx,
             "timestamp": frame_idx / fps if fps > 0 else 0,
             "faces": []
         }
-        
-        if results.detections:
-            for detection in results.detections:
-                bbox = detection.location_data.relative_bounding_box
-                h, w, _ = frame.shape
-                
-                face_info = {
-                    "x": int(bbox.xmin * w),
-                    "y": int(bbox.ymin * h),
-                    "width": int(bbox.width * w),
-                    "height": int(bbox.height * h),
-                    "confidence": detection.score[0]
-                }
-                frame_data["faces"].append(face_info)
-        
-        tracking_data.append(frame_data)
-        frame_idx += 1
-    
-    cap.release()
-    face_detection.close()
-    
-    return tracking_data
+
+        small = cv2.resize(frame, (32, 32), interpolation=cv2.INTER_AREA).astype(np.int16)
+        if prev_small is not None and np.mean(np.abs(small - prev_small)) < 3.0:
+            cache_hits += 1
+            frame_data["faces"] = [dict(f) for f in prev_faces]
+        else:
+            cache_misses += 1
+            h, w = frame.shape[:2]
+
+            # The detector works at ~256-512 px; feeding it full-resolution
+            # frames is wasted TFLite work. Bboxes come back relative, so no
+            # rescaling is needed when converting against the original h/w.
+            det_scale = 512 / max(h, w)
+            det_frame = frame
+            if det_scale < 1:
+                det_frame = cv2.resize(frame, None, fx=det_scale, fy=det_scale,
+                                       interpolation=cv2.INTER_LINEAR)
+
+            # Convert to RGB for MediaPipe (PyAV frames already are)
+            rgb_frame = det_frame if frames_are_rgb else cv2.cvtColor(det_frame, cv2.COLOR_BGR2RGB)
+            results = face_detection.process(rgb_frame)
+
+            if results.detections:
+                for detection in results.detections:
+                    bbox = detection.location_data.relative_bounding_box
+
+                    face_info = {
+                        "x": int(bbox.xmin * w),
+                        "y": int(bbox.ymin * h),
+                        "width": int(bbox.width * w),
+                        "height": int(bbox.height * h),
+                        "confidence": detection.score[0]
+                    }
+                    frame_data["faces"].append(face_info)
+            prev_small = small
+            prev_faces = frame_data["faces"]
+
+        sampled.append(frame_data)
+
+    if cache_hits:
+        log(f"[FACE] cache reused {cache_hits}/{cache_hits + cache_misses} detections",
+            print_also=False)
+
+    frames = sampled if step == 1 else _interpolate_tracking(sampled, n_frames, fps)
+    return VideoTracking(frames=frames, width=src_width, height=src_height, fps=fps)
 
 
 def get_primary_face_region(tracking_data: List[Dict], 
@@ -88,75 +261,52 @@ def get_primary_face_region(tracking_data: List[Dict],
     """
     if not tracking_data:
         return None
-    
-    # Filter frames in time range
-    relevant_frames = [
-        frame for frame in tracking_data
-        if start_time <= frame["timestamp"] and (end_time is None or frame["timestamp"] <= end_time)
+
+    # Flatten all faces into one (M, 6) array so the time filter, the
+    # largest-face-per-frame selection and the averages are NumPy
+    # reductions instead of per-frame Python loops.
+    rows = [
+        (frame["frame"], frame["timestamp"],
+         face["x"], face["y"], face["width"], face["height"])
+        for frame in tracking_data for face in frame["faces"]
     ]
-    
-    if not relevant_frames:
+    if not rows:
         return None
-    
-    # Collect all face bounding boxes
-    all_faces = []
-    for frame in relevant_frames:
-        if frame["faces"]:
-            # Take the largest face (likely the primary subject)
-            largest_face = max(frame["faces"], key=lambda f: f["width"] * f["height"])
-            all_faces.append(largest_face)
-    
-    if not all_faces:
+
+    arr = np.asarray(rows, dtype=np.float32)
+    mask = arr[:, 1] >= start_time
+    if end_time is not None:
+        mask &= arr[:, 1] <= end_time
+    arr = arr[mask]
+    if arr.size == 0:
         return None
-    
-    # Calculate average face position
-    avg_x = int(np.mean([f["x"] for f in all_faces]))
-    avg_y = int(np.mean([f["y"] for f in all_faces]))
-    avg_width = int(np.mean([f["width"] for f in all_faces]))
-    avg_height = int(np.mean([f["height"] for f in all_faces]))
-    
+
+    # Largest face per frame (likely the primary subject): sort by
+    # (frame, area) and keep the last entry of each frame run.
+    area = arr[:, 4] * arr[:, 5]
+    arr = arr[np.lexsort((area, arr[:, 0]))]
+    last = np.r_[arr[1:, 0] != arr[:-1, 0], True]
+
+    avg_x, avg_y, avg_width, avg_height = arr[last, 2:].mean(axis=0)
+
     return {
-        "x": avg_x,
-        "y": avg_y,
-        "width": avg_width,
-        "height": avg_height
+        "x": int(avg_x),
+        "y": int(avg_y),
+        "width": int(avg_width),
+        "height": int(avg_height)
     }
 
 
-def smart_crop_portrait(video_path: str, output_path: str, 
-                       target_aspect: str = "9:16",
-                       padding_factor: float = 1.5,
-                       tracking_data: Optional[List[Dict]] = None) -> str:
+def _compute_crop_rect(width: int, height: int, target_aspect: str,
+                       face_region: Optional[Dict],
+                       padding_factor: float = 1.5) -> Tuple[int, int, int, int]:
     """
-    Smart crop video to portrait mode focusing on detected faces
-    
-    Args:
-        video_path: Path to input video
-        output_path: Path to save cropped video
-        target_aspect: Target aspect ratio (9:16, 4:5, 1:1)
-        padding_factor: Padding around face (1.0 = tight, 2.0 = loose)
-        tracking_data: Pre-computed tracking data (optional)
-    
-    Returns:
-        Path to cropped video
+    Pure crop geometry for one aspect ratio: (crop_w, crop_h, crop_x, crop_y)
     """
-    # Track faces if not provided
-    if tracking_data is None:
-        tracking_data = track_faces(video_path)
-    
-    # Get primary face region
-    face_region = get_primary_face_region(tracking_data)
-    
-    # Get video dimensions
-    cap = cv2.VideoCapture(video_path)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    cap.release()
-    
     # Parse target aspect ratio
     aspect_parts = target_aspect.split(":")
     aspect_w, aspect_h = int(aspect_parts[0]), int(aspect_parts[1])
-    
+
     # Calculate crop dimensions
     if aspect_w > aspect_h:  # Landscape
         crop_width = width
@@ -164,25 +314,25 @@ def smart_crop_portrait(video_path: str, output_path: str,
     else:  # Portrait or square
         crop_height = height
         crop_width = int(height * aspect_w / aspect_h)
-    
+
     # Determine crop center
     if face_region:
         # Center on face
         face_center_x = face_region["x"] + face_region["width"] // 2
         face_center_y = face_region["y"] + face_region["height"] // 2
-        
+
         # Apply padding
         face_size = max(face_region["width"], face_region["height"])
         min_crop_width = int(face_size * padding_factor)
         min_crop_height = int(face_size * padding_factor)
-        
+
         crop_width = max(crop_width, min_crop_width)
         crop_height = max(crop_height, min_crop_height)
-        
+
         # Ensure crop doesn't exceed video dimensions
         crop_width = min(crop_width, width)
         crop_height = min(crop_height, height)
-        
+
         # Calculate crop position
         crop_x = max(0, min(face_center_x - crop_width // 2, width - crop_width))
         crop_y = max(0, min(face_center_y - crop_height // 2, height - crop_height))
@@ -190,25 +340,96 @@ def smart_crop_portrait(video_path: str, output_path: str,
         # No face detected, center crop
         crop_x = (width - crop_width) // 2
         crop_y = (height - crop_height) // 2
-    
+
+    return crop_width, crop_height, crop_x, crop_y
+
+
+def _compute_crop_rects(width: int, height: int, aspect_ratios: List[str],
+                        face_region: Optional[Dict],
+                        padding_factor: float = 1.5) -> np.ndarray:
+    """
+    Vectorized _compute_crop_rect across all ratios at once: an (N, 4)
+    int array of (crop_w, crop_h, crop_x, crop_y) rows, one broadcasted
+    expression per column instead of a Python loop per ratio.
+    """
+    aspects = np.array([[int(p) for p in r.split(":")] for r in aspect_ratios],
+                       dtype=np.float64)
+    landscape = aspects[:, 0] > aspects[:, 1]
+    crop_w = np.where(landscape, width, (height * aspects[:, 0] / aspects[:, 1]).astype(np.int64))
+    crop_h = np.where(landscape, (width * aspects[:, 1] / aspects[:, 0]).astype(np.int64), height)
+
+    if face_region:
+        face_center_x = face_region["x"] + face_region["width"] // 2
+        face_center_y = face_region["y"] + face_region["height"] // 2
+        min_side = int(max(face_region["width"], face_region["height"]) * padding_factor)
+        crop_w = np.minimum(np.maximum(crop_w, min_side), width)
+        crop_h = np.minimum(np.maximum(crop_h, min_side), height)
+        crop_x = np.clip(face_center_x - crop_w // 2, 0, width - crop_w)
+        crop_y = np.clip(face_center_y - crop_h // 2, 0, height - crop_h)
+    else:
+        crop_x = (width - crop_w) // 2
+        crop_y = (height - crop_h) // 2
+
+    return np.stack([crop_w, crop_h, crop_x, crop_y], axis=1).astype(np.int64)
+
+
+def smart_crop_portrait(video_path: str, output_path: str,
+                       target_aspect: str = "9:16",
+                       padding_factor: float = 1.5,
+                       tracking_data: Optional[VideoTracking] = None) -> str:
+    """
+    Smart crop video to portrait mode focusing on detected faces
+
+    Args:
+        video_path: Path to input video
+        output_path: Path to save cropped video
+        target_aspect: Target aspect ratio (9:16, 4:5, 1:1)
+        padding_factor: Padding around face (1.0 = tight, 2.0 = loose)
+        tracking_data: Pre-computed tracking data (optional)
+
+    Returns:
+        Path to cropped video
+    """
+    # Track faces if not provided
+    if tracking_data is None:
+        tracking_data = track_faces(video_path)
+
+    # Get primary face region
+    face_region = get_primary_face_region(tracking_data)
+
+    width, height, _ = _video_meta(tracking_data, video_path)
+
+    crop_width, crop_height, crop_x, crop_y = _compute_crop_rect(
+        width, height, target_aspect, face_region, padding_factor
+    )
+
+    # Identity crop (source already in the target aspect): remux with
+    # stream copy instead of paying a full decode+encode.
+    if (crop_x == 0 and crop_y == 0
+            and abs(crop_width - width) <= 1 and abs(crop_height - height) <= 1):
+        cmd = ["ffmpeg", "-y", "-i", str(video_path), "-c", "copy", str(output_path)]
+        subprocess.run(cmd, check=True, capture_output=True)
+        return str(output_path)
+
     # Apply crop using ffmpeg
     crop_filter = f"crop={crop_width}:{crop_height}:{crop_x}:{crop_y}"
-    
+
+    v_args = h264_encoder_args() or ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast"]
     cmd = [
         "ffmpeg", "-y", "-i", str(video_path),
         "-vf", crop_filter,
-        "-c:v", "libx264", "-crf", "18", "-preset", "veryfast",
+        *v_args,
         "-c:a", "copy",
         str(output_path)
     ]
-    
+
     subprocess.run(cmd, check=True, capture_output=True)
     return str(output_path)
 
 
 def export_multi_aspect(video_path: str, output_dir: str,
                        aspect_ratios: Optional[List[str]] = None,
-                       tracking_data: Optional[List[Dict]] = None) -> Dict[str, str]:
+                       tracking_data: Optional[VideoTracking] = None) -> Dict[str, str]:
     """
     Export video in multiple aspect ratios optimized for different platforms
     
@@ -235,30 +456,132 @@ def export_multi_aspect(video_path: str, output_dir: str,
     # Track faces once for all exports
     if tracking_data is None:
         tracking_data = track_faces(video_path)
-    
-    exports = {}
+
+    face_region = get_primary_face_region(tracking_data)
+
+    # Probe dimensions once for all aspects
+    width, height, _ = _video_meta(tracking_data, video_path)
+
     video_stem = Path(video_path).stem
-    
-    for aspect in aspect_ratios:
+
+    # One ffmpeg invocation: split the decoded stream N ways and crop+encode
+    # each aspect in parallel, so the source is decoded once instead of
+    # once per ratio.
+    n = len(aspect_ratios)
+    rects = _compute_crop_rects(width, height, aspect_ratios, face_region)
+    split_labels = "".join(f"[s{i}]" for i in range(n))
+    filter_parts = [f"[0:v]split={n}{split_labels}"]
+    for i, (crop_w, crop_h, crop_x, crop_y) in enumerate(rects):
+        filter_parts.append(f"[s{i}]crop={crop_w}:{crop_h}:{crop_x}:{crop_y}[v{i}]")
+
+    cmd = ["ffmpeg", "-y", "-i", str(video_path), "-filter_complex", ";".join(filter_parts)]
+
+    v_args = h264_encoder_args() or ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast"]
+    exports = {}
+    for i, aspect in enumerate(aspect_ratios):
         aspect_name = aspect.replace(":", "x")
         output_path = output_dir / f"{video_stem}_{aspect_name}.mp4"
-        
-        try:
-            smart_crop_portrait(
-                video_path, str(output_path),
-                target_aspect=aspect,
-                tracking_data=tracking_data
-            )
-            exports[aspect] = str(output_path)
-        except Exception as e:
-            print(f"Failed to export {aspect}: {e}")
-    
+        cmd += [
+            "-map", f"[v{i}]", "-map", "0:a?",
+            *v_args,
+            "-c:a", "copy",
+            str(output_path)
+        ]
+        exports[aspect] = str(output_path)
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True)
+    except Exception as e:
+        print(f"Failed to export aspects: {e}")
+        return {}
+
     return exports
 
 
+def _blur_intervals(tracking_data: List[Dict], fps: float,
+                    width: int, height: int, tol: int = 20) -> List[Tuple]:
+    """
+    Group per-frame face boxes into (t0, t1, x, y, w, h) time intervals.
+
+    Consecutive frames whose boxes stay within `tol` px extend the same
+    interval (the box grows to the union so motion inside the span stays
+    covered); anything else opens a new one.
+    """
+    intervals = []
+    open_spans = []
+
+    for frame_data in tracking_data:
+        idx = frame_data["frame"]
+        ts = frame_data["timestamp"]
+        matched = set()
+        for face in frame_data["faces"]:
+            x1 = max(0, face["x"]); y1 = max(0, face["y"])
+            x2 = min(width, face["x"] + face["width"])
+            y2 = min(height, face["y"] + face["height"])
+            if x2 - x1 < 2 or y2 - y1 < 2:
+                continue
+            span = None
+            for s in open_spans:
+                if id(s) in matched or s["end_frame"] < idx - 1:
+                    continue
+                if (abs(s["box"][0] - x1) <= tol and abs(s["box"][1] - y1) <= tol
+                        and abs(s["box"][2] - x2) <= tol and abs(s["box"][3] - y2) <= tol):
+                    span = s
+                    break
+            if span:
+                b = span["box"]
+                span["box"] = (min(b[0], x1), min(b[1], y1), max(b[2], x2), max(b[3], y2))
+                span["end_frame"] = idx
+                span["t1"] = ts
+            else:
+                span = {"t0": ts, "t1": ts, "end_frame": idx, "box": (x1, y1, x2, y2)}
+                open_spans.append(span)
+            matched.add(id(span))
+        # Spans not extended for a frame are closed
+        still_open = [s for s in open_spans if s["end_frame"] >= idx - 1]
+        intervals.extend(s for s in open_spans if s["end_frame"] < idx - 1)
+        open_spans = still_open
+
+    intervals.extend(open_spans)
+    frame_t = 1.0 / fps if fps > 0 else 0.0
+    return [
+        (s["t0"], s["t1"] + frame_t,
+         s["box"][0], s["box"][1], s["box"][2] - s["box"][0], s["box"][3] - s["box"][1])
+        for s in intervals
+    ]
+
+
+# Every split branch buffers frames for the whole duration, so the graph
+# must stay bounded no matter how fragmented the tracking is.
+_MAX_BLUR_INTERVALS = 64
+
+
+def _build_blur_filtergraph(intervals: List[Tuple], blur_strength: int) -> Tuple[str, str]:
+    """
+    Filtergraph blurring each interval's region only while it is active:
+    split -> crop+boxblur per interval -> chained overlays gated by
+    enable='between(t,...)'. Returns (filter_complex, final_label).
+    """
+    n = len(intervals)
+    radius = max(2, blur_strength // 5)
+    crop_labels = "".join(f"[c{i}]" for i in range(n))
+    parts = [f"[0:v]split={n + 1}[base]{crop_labels}"]
+    for i, (_, _, x, y, w, h) in enumerate(intervals):
+        # boxblur rejects a radius larger than half the cropped region, so
+        # small faces must clamp per interval or the whole command fails.
+        r = max(1, min(radius, min(w, h) // 2))
+        parts.append(f"[c{i}]crop={w}:{h}:{x}:{y},boxblur={r}:2[b{i}]")
+    prev = "base"
+    for i, (t0, t1, x, y, _, _) in enumerate(intervals):
+        out = f"o{i}"
+        parts.append(f"[{prev}][b{i}]overlay={x}:{y}:enable='between(t,{t0:.3f},{t1:.3f})'[{out}]")
+        prev = out
+    return ";".join(parts), f"[{prev}]"
+
+
 def add_face_blur(video_path: str, output_path: str,
                  blur_strength: int = 51,
-                 tracking_data: Optional[List[Dict]] = None) -> str:
+                 tracking_data: Optional[VideoTracking] = None) -> str:
     """
     Blur faces in video (privacy mode)
     
@@ -273,54 +596,42 @@ def add_face_blur(video_path: str, output_path: str,
     """
     if tracking_data is None:
         tracking_data = track_faces(video_path)
-    
-    # For now, use a simple approach with OpenCV
-    # A full implementation would need frame-by-frame processing
-    
-    cap = cv2.VideoCapture(video_path)
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    
-    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-    temp_output = str(Path(output_path).with_suffix('.avi'))
-    out = cv2.VideoWriter(temp_output, fourcc, fps, (width, height))
-    
-    frame_idx = 0
-    while cap.isOpened():
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        # Get face data for this frame
-        if frame_idx < len(tracking_data):
-            frame_data = tracking_data[frame_idx]
-            for face in frame_data["faces"]:
-                x, y, w, h = face["x"], face["y"], face["width"], face["height"]
-                # Extract face region
-                face_region = frame[y:y+h, x:x+w]
-                if face_region.size > 0:
-                    # Apply blur
-                    blurred = cv2.GaussianBlur(face_region, (blur_strength, blur_strength), 0)
-                    # Replace in frame
-                    frame[y:y+h, x:x+w] = blurred
-        
-        out.write(frame)
-        frame_idx += 1
-    
-    cap.release()
-    out.release()
-    
-    # Convert to final format
+
+    width, height, fps = _video_meta(tracking_data, video_path)
+
+    # Python only emits bboxes; all pixel work happens inside one ffmpeg
+    # filtergraph (crop+boxblur+enable-gated overlays), so no frames ever
+    # cross the Python boundary.
+    intervals = _blur_intervals(tracking_data, fps, width, height)
+    # A moving face opens a new interval roughly every `tol` pixels, so long
+    # footage can fragment into hundreds of branches. Re-group with coarser
+    # tolerances (larger union boxes, fewer spans) until the graph fits.
+    tol = 20
+    while len(intervals) > _MAX_BLUR_INTERVALS and tol < 320:
+        tol *= 2
+        intervals = _blur_intervals(tracking_data, fps, width, height, tol=tol)
+    if len(intervals) > _MAX_BLUR_INTERVALS:
+        # Still too fragmented: blur the union of all regions for the union
+        # of all spans. Heavy-handed, but privacy output must stay covered.
+        t0 = min(i[0] for i in intervals); t1 = max(i[1] for i in intervals)
+        x1 = min(i[2] for i in intervals); y1 = min(i[3] for i in intervals)
+        x2 = max(i[2] + i[4] for i in intervals); y2 = max(i[3] + i[5] for i in intervals)
+        intervals = [(t0, t1, x1, y1, x2 - x1, y2 - y1)]
+    if not intervals:
+        # Nothing to blur: remux at stream-copy speed.
+        subprocess.run(["ffmpeg", "-y", "-i", str(video_path), "-c", "copy", str(output_path)],
+                       check=True, capture_output=True)
+        return str(output_path)
+
+    filter_complex, final_label = _build_blur_filtergraph(intervals, blur_strength)
+    v_args = h264_encoder_args() or ["-c:v", "libx264", "-crf", "18", "-preset", "veryfast"]
     cmd = [
-        "ffmpeg", "-y", "-i", temp_output,
-        "-c:v", "libx264", "-crf", "18", "-preset", "veryfast",
+        "ffmpeg", "-y", "-i", str(video_path),
+        "-filter_complex", filter_complex,
+        "-map", final_label, "-map", "0:a?",
+        *v_args, "-threads", "0",
         "-c:a", "copy",
         str(output_path)
     ]
     subprocess.run(cmd, check=True, capture_output=True)
-    
-    # Cleanup temp file
-    Path(temp_output).unlink(missing_ok=True)
-    
     return str(output_path)
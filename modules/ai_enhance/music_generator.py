@@ -9,6 +9,58 @@ from pathlib import Path
 from typing import Optional, List, Dict
 import json
 
+try:
+    from numba import njit, prange
+except Exception:
+    njit = None
+    prange = range
+
+try:
+    import aubio
+except Exception:
+    aubio = None
+
+
+def _tone_kernel_impl(n: int, duration_sec: float, freqs: np.ndarray, tempo: float) -> np.ndarray:
+    # Fused oscillator bank: one parallel pass over the buffer with no
+    # t/phase/weight temporaries (the vectorized version materializes ~5
+    # full-length arrays per chord).
+    audio = np.zeros(n, dtype=np.float64)
+    two_pi = 2.0 * np.pi
+    dt = duration_sec / max(n - 1, 1)
+    for i in prange(n):
+        ti = i * dt
+        s = 0.0
+        for k in range(freqs.shape[0]):
+            phase = (ti * tempo + k * duration_sec / freqs.shape[0]) % duration_sec
+            weight = np.sin(two_pi * phase / duration_sec)
+            s += 0.25 * np.sin(two_pi * freqs[k] * ti) * weight * weight
+        audio[i] = s
+    return audio
+
+
+_tone_kernel = njit(parallel=True, fastmath=True, cache=True)(_tone_kernel_impl) if njit else None
+
+
+def _finalize_impl(audio: np.ndarray, duration_sec: float, sample_rate: int) -> None:
+    # Envelope + fade-in fused into one in-place pass, instead of 3-4
+    # separate full-buffer sweeps with temporaries. Normalization happens
+    # afterwards: the baseline scales the *enveloped* signal to a fixed peak.
+    n = audio.shape[0]
+    dt = duration_sec / max(n - 1, 1)
+    fade_n = int(sample_rate * 0.5)
+    inv_tau = 1.0 / (duration_sec * 0.8)
+    for i in prange(n):
+        env = np.exp(-(i * dt) * inv_tau)
+        if env > 1.0:
+            env = 1.0
+        if i < fade_n:
+            env *= i / max(fade_n - 1, 1)
+        audio[i] *= env
+
+
+_finalize = njit(parallel=True, fastmath=True, cache=True)(_finalize_impl) if njit else None
+
 
 def generate_tone_sequence(duration_sec: float, mood: str, sample_rate: int = 44100) -> np.ndarray:
     """
@@ -22,8 +74,9 @@ def generate_tone_sequence(duration_sec: float, mood: str, sample_rate: int = 44
     Returns:
         Audio samples as numpy array
     """
-    t = np.linspace(0, duration_sec, int(sample_rate * duration_sec))
-    
+    n = int(sample_rate * duration_sec)
+    t = np.linspace(0, duration_sec, n)
+
     # Define chord progressions and rhythms based on mood
     if mood == "energetic":
         # Fast tempo, major chords
@@ -46,23 +99,27 @@ def generate_tone_sequence(duration_sec: float, mood: str, sample_rate: int = 44
         tempo = 1.0
     
     # Generate music with simple oscillator
-    audio = np.zeros_like(t)
-    for i, freq in enumerate(freqs):
-        phase = (t * tempo + i * duration_sec / len(freqs)) % duration_sec
-        weight = np.sin(2 * np.pi * phase / duration_sec)
-        audio += 0.25 * np.sin(2 * np.pi * freq * t) * (weight ** 2)
-    
-    # Add gentle envelope
-    envelope = np.exp(-t / (duration_sec * 0.8))
-    envelope = np.minimum(envelope, 1.0)
-    fade_in = np.linspace(0, 1, int(sample_rate * 0.5))
-    envelope[:len(fade_in)] *= fade_in
-    
-    audio *= envelope
-    
-    # Normalize
-    audio = audio / np.max(np.abs(audio)) * 0.3
+    if _tone_kernel is not None:
+        audio = _tone_kernel(n, duration_sec, np.asarray(freqs, dtype=np.float64), tempo)
+    else:
+        audio = np.zeros_like(t)
+        for i, freq in enumerate(freqs):
+            phase = (t * tempo + i * duration_sec / len(freqs)) % duration_sec
+            weight = np.sin(2 * np.pi * phase / duration_sec)
+            audio += 0.25 * np.sin(2 * np.pi * freq * t) * (weight ** 2)
     
+    # Gentle envelope and fade-in in one in-place pass, then normalize the
+    # enveloped signal to a 0.3 peak (envelope first: scaling off the raw
+    # peak would leave the output systematically quieter).
+    if _finalize is not None:
+        _finalize(audio, duration_sec, sample_rate)
+    else:
+        envelope = np.minimum(np.exp(-t / (duration_sec * 0.8)), 1.0)
+        fade_in = np.linspace(0, 1, int(sample_rate * 0.5))
+        envelope[:len(fade_in)] *= fade_in
+        np.multiply(audio, envelope, out=audio)
+    audio *= 0.3 / max(np.abs(audio).max(), 1e-9)
+
     return audio.astype(np.float32)
 
 
@@ -82,12 +139,7 @@ def generate_background_music(output_path: str, duration_sec: float,
     """
     # Generate audio samples
     audio = generate_tone_sequence(duration_sec, mood)
-    
-    # Save as temporary WAV file
-    import soundfile as sf
-    temp_wav = str(Path(output_path).with_suffix('.wav'))
-    sf.write(temp_wav, audio, 44100)
-    
+
     # Apply audio effects based on style
     if style == "ambient":
         effect_filter = "aecho=0.8:0.9:1000|1800:0.3|0.25,equalizer=f=2000:t=h:w=500:g=-5"
@@ -98,19 +150,28 @@ def generate_background_music(output_path: str, duration_sec: float,
     else:
         effect_filter = "aecho=0.8:0.9:1000:0.3"
     
-    # Convert to final format with effects
+    # Pipe raw float32 samples straight into ffmpeg: no temp WAV on disk
+    # and no soundfile round trip.
     cmd = [
-        "ffmpeg", "-y", "-i", temp_wav,
+        "ffmpeg", "-y",
+        "-f", "f32le", "-ar", "44100", "-ac", "1", "-i", "pipe:",
         "-af", effect_filter,
         "-c:a", "aac", "-b:a", "128k",
         str(output_path)
     ]
-    
-    subprocess.run(cmd, check=True, capture_output=True)
-    
-    # Cleanup temp file
-    Path(temp_wav).unlink(missing_ok=True)
-    
+
+    proc = subprocess.Popen(cmd, stdin=subprocess.PIPE,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        # ffmpeg may exit before consuming all samples; the return-code
+        # check below turns that into the real error.
+        proc.stdin.write(audio.tobytes())
+        proc.stdin.close()
+    except BrokenPipeError:
+        pass
+    if proc.wait() != 0:
+        raise subprocess.CalledProcessError(proc.returncode, cmd)
+
     return str(output_path)
 
 
@@ -125,50 +186,63 @@ def detect_beats(video_path: str, audio_path: Optional[str] = None) -> List[floa
     Returns:
         List of beat timestamps in seconds
     """
-    import librosa
-    
     # Extract audio if needed
     if audio_path is None:
         temp_audio = "/tmp/temp_beat_audio.wav"
         cmd = ["ffmpeg", "-y", "-i", str(video_path), "-vn", "-acodec", "pcm_s16le", temp_audio]
         subprocess.run(cmd, check=True, capture_output=True)
         audio_path = temp_audio
-    
-    # Load audio and detect beats
-    y, sr = librosa.load(audio_path, sr=None)
-    tempo, beat_frames = librosa.beat.beat_track(y=y, sr=sr)
-    beat_times = librosa.frames_to_time(beat_frames, sr=sr)
-    
+
+    if aubio is not None:
+        # Streaming C beat tracker: constant memory, runs far faster than
+        # librosa's Python-level dynamic programming pass.
+        src = aubio.source(audio_path, 44100, 512)
+        tempo = aubio.tempo("default", 1024, 512, 44100)
+        beat_times = []
+        while True:
+            samples, read = src()
+            if tempo(samples):
+                beat_times.append(float(tempo.get_last_s()))
+            if read < 512:
+                break
+    else:
+        import librosa
+
+        y, sr = librosa.load(audio_path, sr=None)
+        # Precompute the onset envelope once; passing y makes beat_track
+        # redo the same onset analysis internally.
+        env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=512)
+        _, beat_frames = librosa.beat.beat_track(onset_envelope=env, sr=sr, hop_length=512)
+        beat_times = librosa.frames_to_time(beat_frames, sr=sr, hop_length=512).tolist()
+
     # Cleanup temp file if created
     if audio_path == "/tmp/temp_beat_audio.wav":
         Path(audio_path).unlink(missing_ok=True)
-    
-    return beat_times.tolist()
+
+    return beat_times
 
 
 def sync_music_to_beats(video_path: str, music_path: str, output_path: str,
-                       beat_sync: bool = True, volume_level: float = 0.3) -> str:
+                       beat_sync: bool = True, volume_level: float = 0.3,
+                       faststart: bool = True) -> str:
     """
     Sync background music to video beats and mix with original audio
-    
+
     Args:
         video_path: Path to input video
         music_path: Path to background music
         output_path: Path to save output video
         beat_sync: Enable beat synchronization
         volume_level: Background music volume (0.0 to 1.0)
-    
+        faststart: Put the moov atom up front for streaming playback
+
     Returns:
         Path to output video with synced music
     """
-    if beat_sync:
-        # Detect beats in original video
-        beats = detect_beats(video_path)
-        
-        # For now, we'll use a simple mixing approach
-        # In a more advanced version, this could time-stretch music to match beats
-        pass
-    
+    # beat_sync previously ran detect_beats here only to discard the result;
+    # a full beat-detection pass is pure wasted work until time-stretching
+    # to the beat grid is actually implemented, so the flag is a no-op.
+
     # Mix background music with original audio
     filter_complex = f"[0:a]volume=0.7[orig];[1:a]volume={volume_level}[music];[orig][music]amix=inputs=2:duration=first:dropout_transition=2[a]"
     
@@ -179,8 +253,10 @@ def sync_music_to_beats(video_path: str, music_path: str, output_path: str,
         "-filter_complex", filter_complex,
         "-map", "0:v", "-map", "[a]",
         "-c:v", "copy", "-c:a", "aac", "-b:a", "192k",
-        str(output_path)
     ]
+    if faststart:
+        cmd += ["-movflags", "+faststart"]
+    cmd.append(str(output_path))
     
     subprocess.run(cmd, check=True, capture_output=True)
     return str(output_path)
@@ -0,0 +1,40 @@
+import subprocess
+from pathlib import Path
+from .effects_engine import build_filter_chain
+from .video_editor_enhanced import _copy_cut_safe, _video_dims
+
+def fuse_export(input_video, output_path, start_s=0, duration_s=None, target_res="1080x1920", mood="neutral", captions_ass=None):
+    # Cut + cinematic look + optional caption burn-in in a single decode/encode pass.
+    # Pure trim fast path: neutral mood, no captions, input already at the
+    # target resolution, keyframe-aligned cut -> stream copy, no decode/encode.
+    try: tw, th = (int(x) for x in str(target_res).split("x"))
+    except Exception: tw = th = None
+    if (mood == "neutral" and captions_ass is None and _video_dims(str(input_video)) == (tw, th)
+            and _copy_cut_safe(input_video, start_s)):
+        cmd = ["ffmpeg","-y","-ss",f"{start_s}","-i",str(input_video)]
+        if duration_s is not None:
+            cmd += ["-t", f"{duration_s}"]
+        cmd += ["-c","copy","-avoid_negative_ts","make_zero", str(output_path)]
+        subprocess.run(cmd, check=False)
+        return str(output_path)
+    vf = build_filter_chain(target_res=target_res, mood=mood)
+    if captions_ass:
+        vf = f"{vf},ass={captions_ass}"
+    cmd = ["ffmpeg","-y","-ss",f"{start_s}"]
+    if duration_s is not None:
+        cmd += ["-t", f"{duration_s}"]
+    cmd += ["-i", str(input_video), "-vf", vf,
+            "-c:v","libx264","-crf","18","-preset","veryfast","-pix_fmt","yuv420p",
+            "-c:a","aac","-b:a","128k","-movflags","+faststart", str(output_path)]
+    subprocess.run(cmd, check=False)
+    return str(output_path)
+
+def fuse_export_many(input_video, cut_list, out_paths, target_res="1080x1920", captions_ass=None):
+    # Convenience wrapper: one fused pass per cut, avoiding the old export→caption re-encode chain.
+    results = []
+    for s, out in zip(cut_list, out_paths):
+        duration = max(0.3, s["end"] - s["start"])
+        results.append(fuse_export(input_video, out, start_s=s["start"], duration_s=duration,
+                                   target_res=target_res, mood=s.get("mood", "neutral"),
+                                   captions_ass=captions_ass))
+    return results
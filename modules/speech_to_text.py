@@ -1,22 +1,64 @@
-import subprocess, json
+import functools, subprocess, json
+import numpy as np
 from pathlib import Path
-from .utils import ensure_dir, write_json, log, get_timestamp
+from .utils import ensure_dir, write_json, log, get_timestamp, ffmpeg_thread_args
+
+try:
+    from faster_whisper import WhisperModel
+except Exception:
+    WhisperModel = None
+
+@functools.lru_cache(maxsize=4)
+def _get_whisper_model(size: str):
+    # Loading a model deserializes hundreds of MB of weights; keep it for
+    # the life of the process instead of reloading per video.
+    if WhisperModel is not None:
+        # CTranslate2 backend: int8 quantization is ~4x faster on CPU at
+        # the same word error rate as the reference implementation.
+        try:
+            import torch; cuda = torch.cuda.is_available()
+        except Exception:
+            cuda = False
+        return WhisperModel(size, device="cuda" if cuda else "cpu",
+                            compute_type="int8_float16" if cuda else "int8")
+    import whisper
+    return whisper.load_model(size)
+
+def _run_transcribe(model, audio):
+    # audio is a float32 16 kHz array (or a wav path as fallback). Returns
+    # the classic whisper {"text", "segments"} dict whichever backend is
+    # loaded, so downstream JSON consumers are unaffected.
+    if WhisperModel is not None and isinstance(model, WhisperModel):
+        segments, _info = model.transcribe(audio, beam_size=5, vad_filter=True)
+        segs = [{"id": i, "start": float(s.start), "end": float(s.end), "text": s.text}
+                for i, s in enumerate(segments)]
+        return {"text": "".join(s["text"] for s in segs), "segments": segs}
+    try:
+        import torch; fp16 = torch.cuda.is_available()
+    except Exception:
+        fp16 = False
+    return model.transcribe(audio, verbose=False, fp16=fp16)
 
 def transcribe_video(video_path: str, output_dir: str = "outputs/captions", model_size: str = "small"):
     ensure_dir(output_dir)
     ts = get_timestamp()
     stem = Path(video_path).stem
     wav_path = str(Path(output_dir) / f"{stem}_{ts}.wav")
-    cmd = ["ffmpeg","-y","-i", video_path, "-vn","-ac","1","-ar","16000", wav_path]
-    subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    # One decode, two outputs: the wav artifact (downstream consumers use
+    # it) plus raw s16le PCM on stdout so Whisper never re-reads the wav.
+    cmd = ["ffmpeg","-y", *ffmpeg_thread_args(), "-i", video_path,
+           "-vn","-ac","1","-ar","16000", wav_path,
+           "-vn","-ac","1","-ar","16000","-f","s16le","pipe:"]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    pcm = proc.stdout.read(); proc.wait()
+    audio = np.frombuffer(pcm, dtype=np.int16).astype(np.float32) / 32768.0 if pcm else wav_path
 
     json_path = str(Path(output_dir) / f"{stem}_{ts}.json")
     txt_path = str(Path(output_dir) / f"{stem}_{ts}.txt")
     try:
-        import whisper
         log(f"[INFO] Loading Whisper model ({model_size}) ...")
-        model = whisper.load_model(model_size)
-        result = model.transcribe(wav_path, verbose=False)
+        model = _get_whisper_model(model_size)
+        result = _run_transcribe(model, audio)
         with open(txt_path, "w", encoding="utf-8") as f:
             f.write(result.get("text","").strip())
         write_json(result, json_path)
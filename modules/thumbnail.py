@@ -1,11 +1,45 @@
-import subprocess
+import os, subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from .utils import ensure_dir, log
+from .utils import ensure_dir, ffmpeg_thread_args, log
+
+try:
+    import av
+except Exception:
+    av = None
 
 def generate_thumbnail(video_path: str, time_s: float, out_path: str, title: str = ""):
     ensure_dir(str(Path(out_path).parent))
     ts = max(0.0, float(time_s))
-    cmd = ["ffmpeg","-y","-ss", f"{ts}", "-i", video_path, "-vframes","1", out_path]
+    # -ss before -i: keyframe fast-seek instead of decoding from t=0
+    cmd = ["ffmpeg","-y", *ffmpeg_thread_args(), "-ss", f"{ts}", "-i", video_path, "-vframes","1", out_path]
     log(f"[INFO] Thumbnail @ {ts:.2f}s → {out_path}")
     subprocess.run(cmd, check=False, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
     return out_path
+
+def generate_thumbnails(video_path: str, times, out_paths, title: str = ""):
+    pairs = list(zip(times, out_paths))
+    if not pairs:
+        return []
+    if av is not None:
+        # One open container, one seek per timestamp: no ffmpeg process
+        # spawn (~hundreds of ms each) per thumbnail.
+        try:
+            with av.open(video_path) as container:
+                stream = container.streams.video[0]
+                for time_s, out_path in pairs:
+                    ts = max(0.0, float(time_s))
+                    ensure_dir(str(Path(out_path).parent))
+                    container.seek(int(ts / av.time_base))  # AV_TIME_BASE units
+                    for frame in container.decode(stream):
+                        if frame.time is None or frame.time >= ts:
+                            frame.to_image().save(out_path)
+                            break
+                    log(f"[INFO] Thumbnail @ {ts:.2f}s → {out_path}")
+            return [p for _, p in pairs]
+        except Exception as e:
+            log(f"[WARN] PyAV thumbnail batch failed, falling back to ffmpeg: {e}")
+    # Each grab is an independent fast-seeking ffmpeg, so N of them run
+    # fine in parallel instead of back to back.
+    with ThreadPoolExecutor(max_workers=min(len(pairs), os.cpu_count() or 1)) as ex:
+        return list(ex.map(lambda p: generate_thumbnail(video_path, p[0], p[1], title), pairs))
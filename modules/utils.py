@@ -1,41 +1,130 @@
-import os, json, yaml, sys
+import collections, functools, logging, os, json, subprocess, threading, yaml, sys
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import orjson
+except Exception:
+    orjson = None
+
+def run_ffmpeg_logged(cmd, tail=200):
+    # Run an ffmpeg command keeping only the last `tail` stderr lines in a
+    # bounded deque (capture_output would buffer the whole log in RAM).
+    # Returns (returncode, logs) with the command line as the first entry.
+    logs = collections.deque(maxlen=tail)
+    logs.append(" ".join(cmd))
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    def _drain():
+        for line in proc.stderr:
+            logs.append(line.rstrip())
+    t = threading.Thread(target=_drain, daemon=True)
+    t.start()
+    proc.wait(); t.join()
+    return proc.returncode, list(logs)
+
+@functools.lru_cache(maxsize=1)
+def detect_hw_encoder():
+    # Probe ffmpeg once for a hardware H.264 encoder (cached for the process).
+    try:
+        out = subprocess.run(["ffmpeg","-hide_banner","-encoders"],
+                             capture_output=True, text=True).stdout
+    except Exception:
+        return None
+    for enc in ("h264_nvenc", "h264_qsv", "h264_vaapi"):
+        if enc in out:
+            return enc
+    return None
+
+def h264_encoder_args():
+    # Encoder args for the detected hardware encoder, or None to use libx264.
+    # VAAPI needs a hwupload filter chain, so only callers that manage their
+    # own -vf should use it; the generic helper sticks to nvenc/qsv.
+    enc = detect_hw_encoder()
+    if enc == "h264_nvenc":
+        return ["-c:v","h264_nvenc","-preset","p4","-rc","vbr","-cq","23"]
+    if enc == "h264_qsv":
+        return ["-c:v","h264_qsv","-preset","veryfast","-global_quality","23"]
+    return None
+
+def ffmpeg_thread_args():
+    # Explicit threading flags: several heavy filters (minterpolate, zscale,
+    # histeq) default to few or single filter threads.
+    n = str(os.cpu_count() or 1)
+    return ["-threads","0","-filter_threads",n,"-filter_complex_threads",n]
+
 def ensure_dir(path: str):
     p = Path(path); p.mkdir(parents=True, exist_ok=True); return p
 
+@functools.lru_cache(maxsize=1)
 def read_config(config_path: str = "config.yaml"):
     if not os.path.exists(config_path):
         return {"whisper_model":"small","num_top_clips":3,"scene_threshold":30,"output_resolution":"1080x1920"}
     with open(config_path, "r", encoding="utf-8") as f:
         return yaml.safe_load(f)
 
+def invalidate_config_cache():
+    # Call after mutating config.yaml so the next read_config() re-parses it.
+    read_config.cache_clear()
+
 def get_timestamp():
     return datetime.now().strftime("%Y%m%d_%H%M%S")
 
 def write_json(data, path: str):
     ensure_dir(str(Path(path).parent))
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        # C serializer; OPT_SERIALIZE_NUMPY spares callers the .tolist()
+        # dance on numpy scalars/arrays in score dicts.
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
     return path
 
 def read_json(path: str):
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
     with open(path, "r", encoding="utf-8") as f:
         return json.load(f)
 
+class _StdoutProxy:
+    # Resolves sys.stdout at write time, so hosts that redirect stdout
+    # (e.g. an embedding UI capturing pipeline output) see log lines too.
+    def write(self, s):
+        try: sys.stdout.write(s)
+        except Exception: pass
+    def flush(self):
+        try: sys.stdout.flush()
+        except Exception: pass
+
+@functools.lru_cache(maxsize=8)
+def _get_logger(log_file: str, print_also: bool):
+    # One persistent FileHandler per log file: log() used to mkdir + open +
+    # close the file on every message, which dominates in tight loops.
+    ensure_dir(str(Path(log_file).parent))
+    logger = logging.getLogger(f"pragyaedits:{log_file}:{print_also}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    # getLogger returns the same global instance after an lru_cache
+    # eviction re-runs this body; without the guard every eviction stacks
+    # another handler set and each line is written multiple times.
+    if not logger.handlers:
+        fmt = logging.Formatter("[%(asctime)s] %(message)s", datefmt="%H:%M:%S")
+        fh = logging.FileHandler(log_file, encoding="utf-8")
+        fh.setFormatter(fmt)
+        logger.addHandler(fh)
+        if print_also:
+            sh = logging.StreamHandler(_StdoutProxy())
+            sh.setFormatter(fmt)
+            logger.addHandler(sh)
+    return logger
+
 def log(message: str, log_dir: str = "logs", filename: str = None, print_also=True):
-    ensure_dir(log_dir)
     date = datetime.now().strftime("%Y%m%d")
-    log_file = Path(log_dir) / (filename or f"run_{date}.log")
-    timestamp = datetime.now().strftime("%H:%M:%S")
-    line = f"[{timestamp}] {message}\n"
-    with open(log_file, "a", encoding="utf-8") as f:
-        f.write(line)
-    if print_also:
-        try:
-            print(line.strip())
-        except Exception:
-            try: sys.stdout.buffer.write(line.encode("utf-8", errors="ignore"))
-            except Exception: pass
-    return str(log_file)
+    log_file = str(Path(log_dir) / (filename or f"run_{date}.log"))
+    try:
+        _get_logger(log_file, bool(print_also)).info(message)
+    except Exception:
+        pass
+    return log_file
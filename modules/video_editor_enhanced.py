@@ -1,12 +1,62 @@
-import subprocess
+import functools, subprocess
 from .effects_engine import build_filter_chain
+from .utils import ffmpeg_thread_args
+
+@functools.lru_cache(maxsize=32)
+def _video_dims(path: str):
+    try:
+        out = subprocess.check_output(["ffprobe","-v","error","-select_streams","v:0",
+                                       "-show_entries","stream=width,height","-of","csv=p=0", str(path)],
+                                      stderr=subprocess.DEVNULL, text=True)
+        w, h = out.strip().split(",")[:2]
+        return int(w), int(h)
+    except Exception:
+        return None
+
+@functools.lru_cache(maxsize=32)
+def _keyframe_times(path: str):
+    # Keyframe timestamps from packet flags (no decode); empty on failure,
+    # which callers treat as "copy cut unsafe".
+    try:
+        out = subprocess.check_output(["ffprobe","-v","error","-select_streams","v:0",
+                                       "-show_entries","packet=pts_time,flags","-of","csv=p=0", str(path)],
+                                      stderr=subprocess.DEVNULL, text=True)
+    except Exception:
+        return ()
+    times = []
+    for line in out.splitlines():
+        parts = line.split(",")
+        if len(parts) >= 2 and "K" in parts[1] and parts[0] not in ("", "N/A"):
+            times.append(float(parts[0]))
+    return tuple(sorted(times))
+
+def _copy_cut_safe(path, start_s):
+    # Input-side -ss with -c copy snaps to the keyframe at-or-before the cut,
+    # so on long-GOP sources the copied clip starts up to a GOP early and -t
+    # then truncates the tail. Only trust the copy path when the cut already
+    # sits on a keyframe (or at the very start).
+    if not float(start_s):
+        return True
+    return any(abs(k - float(start_s)) < 0.02 for k in _keyframe_times(str(path)))
 
 def export_with_effects(input_video, output_path, start_s=0, duration_s=None, crop=None, target_res="1080x1920", mood="neutral"):
+    # Pure trim fast path: neutral mood, no crop, input already at target
+    # resolution, keyframe-aligned cut -> stream copy, no decode/encode at all.
+    try: tw, th = (int(x) for x in str(target_res).split("x"))
+    except Exception: tw = th = None
+    if (mood == "neutral" and crop is None and _video_dims(str(input_video)) == (tw, th)
+            and _copy_cut_safe(input_video, start_s)):
+        cmd = ["ffmpeg","-y","-ss",f"{start_s}","-i",str(input_video)]
+        if duration_s is not None:
+            cmd += ["-t", f"{duration_s}"]
+        cmd += ["-c","copy","-avoid_negative_ts","make_zero", str(output_path)]
+        subprocess.run(cmd, check=False)
+        return str(output_path)
     vf = build_filter_chain(target_res=target_res, mood=mood)
-    cmd = ["ffmpeg","-y","-ss",f"{start_s}"]
+    cmd = ["ffmpeg","-y", *ffmpeg_thread_args(), "-ss",f"{start_s}"]
     if duration_s is not None:
         cmd += ["-t", f"{duration_s}"]
-    cmd += ["-i", str(input_video), "-vf", vf, "-c:v","libx264","-crf","18","-preset","veryfast","-pix_fmt","yuv420p",
-            "-c:a","aac","-b:a","128k", str(output_path)]
+    cmd += ["-i", str(input_video), "-vf", vf, "-c:v","libx264","-crf","18","-preset","veryfast","-tune","fastdecode","-pix_fmt","yuv420p",
+            "-c:a","aac","-b:a","128k", "-movflags","+faststart", str(output_path)]
     subprocess.run(cmd, check=False)
     return str(output_path)
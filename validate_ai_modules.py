@@ -0,0 +1,72 @@
+"""Fast syntax validator for the Pragya modules.
+
+Byte-compiles every project .py file without retaining an AST
+(compile() is cheaper than ast.parse for a pass/fail check) and fans
+the file reads across a thread pool. Files unchanged since the last
+green run are skipped via a .pyc-style (mtime, size) cache.
+"""
+
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).parent
+CACHE_FILE = ROOT / ".validate_cache.json"
+
+
+def iter_python_files():
+    yield ROOT / "main.py"
+    yield ROOT / "streamlit_app_pragya.py"
+    for sub in ("modules", "modules/addons", "modules/ai_enhance"):
+        yield from sorted((ROOT / sub).glob("*.py"))
+
+
+def check_file_syntax(path):
+    try:
+        compile(path.read_bytes(), str(path), "exec", dont_inherit=True)
+        return path, None
+    except SyntaxError as e:
+        return path, f"{e.msg} (line {e.lineno})"
+
+
+def _load_cache():
+    try:
+        return json.loads(CACHE_FILE.read_text())
+    except Exception:
+        return {}
+
+
+def main():
+    files = [p for p in iter_python_files() if p.exists()]
+    cache = _load_cache()
+
+    # Same invalidation key as CPython's .pyc check: mtime + size
+    keys = {}
+    to_check = []
+    for p in files:
+        st = p.stat()
+        keys[str(p)] = f"{st.st_mtime_ns}:{st.st_size}"
+        if cache.get(str(p)) != keys[str(p)]:
+            to_check.append(p)
+
+    with ThreadPoolExecutor(max_workers=8) as ex:
+        results = list(ex.map(check_file_syntax, to_check))
+    failed = [(p, err) for p, err in results if err]
+    for p, err in failed:
+        print(f"[FAIL] {p}: {err}")
+        keys.pop(str(p), None)  # failing files re-check next run
+
+    tmp = str(CACHE_FILE) + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(keys, f)
+    os.replace(tmp, CACHE_FILE)
+
+    skipped = len(files) - len(to_check)
+    print(f"{len(files) - len(failed)}/{len(files)} files OK ({skipped} unchanged, skipped)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())